@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 import os
 import requests
+import ipaddress
 import json
 import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuration
 PROJECT_ROOT = Path("/home/patrick/projects")
@@ -13,32 +17,79 @@ CACHE_FILE = PROJECT_ROOT / "scripts" / ".ipv64_ip_cache"
 # IPv64 Update Configuration
 API_URL = "https://ipv64.net/api.php"
 
-def get_env_variable(var_name):
-    """Simple helper to get variable from .env file without external deps."""
+# Shared session so repeated calls to the same host reuse the TCP/TLS connection.
+# At most a few hosts are contacted; pool_maxsize matches the update fan-out.
+UPDATE_WORKERS = 16
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=UPDATE_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.2),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+# Separate no-retry session with short timeouts for the IP echo services: the
+# losing requests of the race keep running until they finish, and the
+# interpreter waits for them on exit, so they must fail fast.
+IP_TIMEOUT = (2, 3)
+IP_SESSION = requests.Session()
+_ip_adapter = HTTPAdapter(pool_connections=3, pool_maxsize=1, max_retries=0)
+IP_SESSION.mount("http://", _ip_adapter)
+IP_SESSION.mount("https://", _ip_adapter)
+
+def _load_env():
+    """Parses the .env file once into a dict without external deps."""
+    env = {}
     if not ENV_FILE.exists():
-        return None
+        return env
     with open(ENV_FILE, "r") as f:
         for line in f:
-            if line.strip().startswith(f"{var_name}="):
-                val = line.strip().split("=", 1)[1]
-                return val.strip("'\"")
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, val = line.split("=", 1)
+            # First occurrence wins, matching the old line-by-line lookup
+            env.setdefault(key, val.strip("'\""))
+    return env
+
+_ENV = _load_env()
+
+def get_env_variable(var_name):
+    """Simple helper to get variable from .env file without external deps."""
+    return _ENV.get(var_name)
+
+def _fetch_ip(service):
+    """Returns the IPv4 address reported by one service, or None.
+
+    Dual-stack services answer with the IPv6 address when reached over IPv6,
+    which never matches the A record, so anything but IPv4 is rejected.
+    """
+    try:
+        response = IP_SESSION.get(service, timeout=IP_TIMEOUT)
+        if response.status_code == 200:
+            return str(ipaddress.IPv4Address(response.text.strip()))
+    except:
+        pass
     return None
 
 def get_public_ip():
-    """Fetches the current public IPv4 address."""
+    """Fetches the current public IPv4 address, racing all services and taking the first answer."""
     services = [
         "https://checkip.amazonaws.com",
         "https://ifconfig.me/ip",
         "https://icanhazip.com"
     ]
-    for service in services:
-        try:
-            response = requests.get(service, timeout=5)
-            if response.status_code == 200:
-                return response.text.strip()
-        except:
-            continue
-    return None
+    executor = ThreadPoolExecutor(max_workers=len(services))
+    try:
+        futures = [executor.submit(_fetch_ip, service) for service in services]
+        for future in as_completed(futures):
+            ip = future.result()
+            if ip:
+                return ip
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 def update_dyndns(api_key, ip):
     """Updates DynDNS records by first fetching tokens then using the update endpoint."""
@@ -48,7 +99,7 @@ def update_dyndns(api_key, ip):
     
     try:
         # 1. Get all domains and their update hashes
-        resp = requests.get(api_url + "?get_domains", headers=headers)
+        resp = SESSION.get(api_url + "?get_domains", headers=headers, timeout=10)
         if resp.status_code != 200:
             print(f"Failed to fetch domains: {resp.text}")
             return False
@@ -58,17 +109,32 @@ def update_dyndns(api_key, ip):
             print("No domains found in account.")
             return False
             
-        success = True
+        updates = []
         for domain, info in domains_data.items():
             token = info.get("domain_update_hash")
             if not token:
                 continue
-                
-            print(f"Updating {domain}...")
-            # 2. Use the Domain Update Hash on update.php (Standard DynDNS)
+            updates.append((domain, token))
+
+        # 2. Use the Domain Update Hash on update.php (Standard DynDNS), all domains at once
+        def send_update(update):
+            _, token = update
             upd_params = {"key": token, "ip": ip}
-            upd_resp = requests.get(update_url, params=upd_params)
-            
+            try:
+                return SESSION.get(update_url, params=upd_params, timeout=5)
+            except requests.RequestException as e:
+                return e
+
+        print(f"Updating {len(updates)} domains...")
+        with ThreadPoolExecutor(max_workers=UPDATE_WORKERS) as executor:
+            results = list(executor.map(send_update, updates))
+
+        success = True
+        for (domain, _), upd_resp in zip(updates, results):
+            if isinstance(upd_resp, requests.RequestException):
+                print(f"  {domain} update failed: {upd_resp}")
+                success = False
+                continue
             content = upd_resp.text.lower()
             if "good" in content or "nochg" in content:
                 print(f"  {domain} updated successfully: {upd_resp.text}")
@@ -85,7 +151,7 @@ def update_dyndns(api_key, ip):
 def get_dns_ip(domain):
     """Checks what the domain currently resolves to in public DNS."""
     try:
-        return socket.gethostbyname(domain)
+        return socket.getaddrinfo(domain, None, family=socket.AF_INET)[0][4][0]
     except:
         return None
 